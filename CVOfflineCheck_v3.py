@@ -1,8 +1,25 @@
+import io
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import argparse
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+# Leading YYYY-MM-DD of an ISO 8601 date or timestamp
+ISO_DATE_PATTERN = r'\d{4}-\d{2}-\d{2}'
+# Read buffer for CSV files on network shares, to cut the number of SMB round-trips
+NETWORK_READ_BUFFER_SIZE = 4 * 1024 * 1024
+# Separates the leading token of a PDF filename, e.g. 'CB1_rev2' -> 'CB1'
+FILENAME_TOKEN_SEPARATOR = re.compile(r'[ _]')
+# Number of lines written to the console per write call for long listings
+OUTPUT_BATCH_SIZE = 500
 def get_weekday_abbreviation(date):
     """Convert date to weekday abbreviation (Mon, Tue, Wed, Thu, Fri)."""
     weekdays = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
@@ -22,25 +39,39 @@ def get_expected_weekdays_and_dates(current_date):
             expected_dates.append(check_date.strftime('%Y-%m-%d'))
         check_date -= timedelta(days=1)
     return expected_weekdays, expected_dates
+def find_date_column(columns):
+    """
+    Find the date column (could be 'Date', 'date', 'DATE', etc.).
+    Returns the column name or None if not found.
+    """
+    for col in columns:
+        if 'date' in col.lower():
+            return col
+    return None
 def validate_report_date(df, expected_dates):
     """
     Validate if the report contains data from expected dates.
     Returns (is_valid, actual_date, error_message).
     """
-    if df.empty:
-        return False, None, "Report is empty"
-    # Try to find date column (could be 'Date', 'date', 'DATE', etc.)
-    date_column = None
-    for col in df.columns:
-        if 'date' in col.lower():
-            date_column = col
-            break
+    date_column = find_date_column(df.columns)
     if date_column is None:
         return False, None, "No date column found in report"
+    if df.empty:
+        return False, None, "Report is empty"
     # Get the most recent date from the report
     try:
-        df[date_column] = pd.to_datetime(df[date_column])
-        actual_date = df[date_column].max().strftime('%Y-%m-%d')
+        dates = df[date_column].dropna()
+        if dates.empty:
+            return False, None, "No dates found in report"
+        if pd.api.types.is_datetime64_any_dtype(dates):
+            actual_date = dates.max().strftime('%Y-%m-%d')
+        else:
+            text_dates = dates.astype(str)
+            if text_dates.str.match(ISO_DATE_PATTERN).all():
+                # ISO dates sort correctly as strings, so only the max needs slicing
+                actual_date = text_dates.max()[:10]
+            else:
+                actual_date = pd.to_datetime(dates, cache=True).max().strftime('%Y-%m-%d')
         # Check if the actual date matches any expected date
         if actual_date in expected_dates:
             return True, actual_date, None
@@ -48,54 +79,224 @@ def validate_report_date(df, expected_dates):
             return False, actual_date, f"Report date {actual_date} does not match expected dates"
     except Exception as e:
         return False, None, f"Error parsing dates: {str(e)}"
-def find_and_validate_report(diffreport_folder, report_type, expected_weekdays, expected_dates):
+def is_network_path(path):
+    """Check if path points to a UNC network share (\\\\server\\share)."""
+    return path.startswith(('\\\\', '//'))
+def load_report_source(csv_file):
+    """
+    Prepare a DiffReport CSV file for (repeated) parsing.
+    Files on network shares are fetched once in large buffered reads and
+    returned as bytes; local files are returned as their path.
+    """
+    if is_network_path(csv_file):
+        with open(csv_file, 'rb', buffering=NETWORK_READ_BUFFER_SIZE) as f:
+            return f.read()
+    return csv_file
+def read_report_columns(source):
+    """Read only the header row of a DiffReport CSV source."""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    # The pyarrow engine does not support nrows, use the C parser for the header
+    return pd.read_csv(source, engine='c', nrows=0).columns
+def read_report_csv(source, usecols=None):
+    """
+    Read a DiffReport CSV source (path or bytes) into a dataframe.
+    Local files are memory-mapped by the C parser.
+    Uses the multithreaded pyarrow parser when pyarrow is installed, and
+    falls back to the C parser for files pyarrow does not handle the same
+    way (short rows, duplicate column names).
+    """
+    is_local = not isinstance(source, bytes)
+    if not is_local:
+        source = io.BytesIO(source)
+    if HAS_PYARROW:
+        try:
+            df = pd.read_csv(source, engine='pyarrow', usecols=usecols)
+            # pyarrow keeps duplicate headers as-is; the C parser renames them
+            if df.columns.is_unique:
+                return df
+        except (pd.errors.ParserError, pa.ArrowException):
+            pass
+        if not is_local:
+            source.seek(0)
+    return pd.read_csv(source, engine='c', usecols=usecols, low_memory=False, memory_map=is_local)
+def find_and_validate_report(diffreport_folder, report_type, expected_weekdays, expected_dates, verbose=False):
     """
     Find and validate a report file.
+    The folder is listed once and candidate filenames are checked against
+    that listing, which is also printed in verbose mode.
     Returns tuple of (dataframe, filename, date) or (None, None, None) if not found.
     """
-    found_df = None
-    found_file = None
-    found_date = None
     print(f"  Searching in: {diffreport_folder}")
+    # One listing replaces a network round-trip per candidate weekday.
+    # Names are lowercased since Windows shares match filenames case-insensitively.
     try:
         files_in_folder = os.listdir(diffreport_folder)
+        available_files = frozenset(f.lower() for f in files_in_folder)
+    except Exception as e:
+        print(f"  ✗ Cannot access folder: {e}")
+        files_in_folder = []
+        available_files = None
+    if verbose and available_files is not None:
         matching_files = [f for f in files_in_folder if f.startswith(report_type)]
         if matching_files:
             print(f"  Found {len(matching_files)} {report_type} files: {', '.join(matching_files)}")
         else:
             print(f"  ⚠ No {report_type} files found in folder!")
-    except Exception as e:
-        print(f"  ✗ Cannot access folder: {e}")
     for weekday in reversed(expected_weekdays):
-        csv_file = os.path.join(diffreport_folder, f"{report_type}_Diff_{weekday}.csv")
-        print(f"  Looking for: {report_type}_Diff_{weekday}.csv ... ", end="")
-        if os.path.exists(csv_file):
-            print("FOUND")
-            df = pd.read_csv(csv_file)
-            is_valid, actual_date, error_msg = validate_report_date(df, expected_dates)
-            if is_valid:
-                print(f"    ✓ Valid report with date: {actual_date}")
-                return df, f"{report_type}_Diff_{weekday}.csv", actual_date
-            else:
-                print(f"    ✗ Invalid or outdated: {error_msg}")
-        else:
+        report_file = f"{report_type}_Diff_{weekday}.csv"
+        csv_file = os.path.join(diffreport_folder, report_file)
+        print(f"  Looking for: {report_file} ... ", end="")
+        if available_files is not None and report_file.lower() not in available_files:
+            print("NOT FOUND")
+            continue
+        # Without a folder listing, let a failed open mark the file as missing
+        try:
+            source = load_report_source(csv_file)
+            columns = read_report_columns(source)
+        except OSError:
             print("NOT FOUND")
+            continue
+        print("FOUND")
+        # Validate on the date column alone, so outdated reports are rejected
+        # without parsing every column
+        date_column = find_date_column(columns)
+        if date_column is None:
+            dates_df = pd.DataFrame(columns=columns)
+        else:
+            dates_df = read_report_csv(source, usecols=[date_column])
+        is_valid, actual_date, error_msg = validate_report_date(dates_df, expected_dates)
+        if is_valid:
+            print(f"    ✓ Valid report with date: {actual_date}")
+            return read_report_csv(source), report_file, actual_date
+        else:
+            print(f"    ✗ Invalid or outdated: {error_msg}")
     return None, None, None
-def find_pdf(pdf_base_path, equipment_name):
+def to_long_path(path):
     """
-    Search for PDF file in nested folder structure.
-    Returns the full path to the PDF if found, None otherwise.
+    On Windows, convert a path to extended-length form (\\\\?\\...) so folders
+    nested deeper than MAX_PATH (260 characters) can still be scanned.
+    Returns the path unchanged on other platforms.
     """
-    equipment_name_clean = equipment_name.strip()
-    # Search in all subdirectories
-    for root, dirs, files in os.walk(pdf_base_path):
-        for file in files:
-            if file.lower().endswith('.pdf'):
-                # Check if equipment name matches (case-insensitive)
-                if equipment_name_clean.lower() in file.lower() or file.lower().replace('.pdf', '') == equipment_name_clean.lower():
-                    return os.path.join(root, file)
-    return None
-def check_pdf_status(diffreport_folder, pdf_base_path, output_folder, output_filename):
+    if os.name != 'nt' or path.startswith('\\\\?\\'):
+        return path
+    path = os.path.abspath(path)
+    if path.startswith('\\\\'):
+        return '\\\\?\\UNC\\' + path[2:]
+    return '\\\\?\\' + path
+def from_long_path(path):
+    """Convert an extended-length Windows path back to its normal form."""
+    if path.startswith('\\\\?\\UNC\\'):
+        return '\\\\' + path[8:]
+    if path.startswith('\\\\?\\'):
+        return path[4:]
+    return path
+def _iter_pdf_files(path):
+    """
+    Recursively yield (lowercase name without extension, full path) for PDF
+    files under path.
+    Uses os.scandir so file type checks reuse the cached directory entry and
+    entry.path provides the joined path without os.path.join calls.
+    """
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from _iter_pdf_files(entry.path)
+                        continue
+                    # Lowercase each filename once; it doubles as the index key
+                    name_lower = entry.name.lower()
+                    if name_lower.endswith('.pdf') and entry.is_file():
+                        yield name_lower[:-4], entry.path
+                except OSError:
+                    continue
+    except OSError:
+        return
+def _scan_subtree(path):
+    """Index all PDF files below a single directory."""
+    pdf_index = {}
+    for stem, pdf_path in _iter_pdf_files(path):
+        pdf_index.setdefault(stem, pdf_path)
+    return pdf_index
+def build_pdf_index(pdf_base_path):
+    """
+    Scan the PDF folder structure once and index every PDF file.
+    Top-level subdirectories are scanned concurrently to overlap network
+    round-trips on remote shares.
+    Returns dict mapping lowercase filename without extension to the full
+    path of the first PDF found with that name.
+    """
+    pdf_index = {}
+    top_dirs = []
+    try:
+        with os.scandir(pdf_base_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        top_dirs.append(entry.path)
+                        continue
+                    name_lower = entry.name.lower()
+                    if name_lower.endswith('.pdf') and entry.is_file():
+                        pdf_index.setdefault(name_lower[:-4], entry.path)
+                except OSError:
+                    continue
+    except OSError:
+        return pdf_index
+    # Scanning is latency-bound, so use more threads than CPU cores
+    max_workers = min(32, (os.cpu_count() or 4) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for subtree_index in executor.map(_scan_subtree, top_dirs):
+            for key, pdf_path in subtree_index.items():
+                pdf_index.setdefault(key, pdf_path)
+    return pdf_index
+def build_token_index(pdf_index):
+    """
+    Index PDF files by the first token of their name (text before the first
+    space or underscore), e.g. 'cb1 rev2' -> 'cb1'.
+    """
+    token_index = {}
+    for stem, pdf_path in pdf_index.items():
+        token_index.setdefault(FILENAME_TOKEN_SEPARATOR.split(stem, 1)[0], pdf_path)
+    return token_index
+def find_pdfs(pdf_index, equipment_keys):
+    """
+    Match normalized (stripped, lowercase) equipment names to PDF files in
+    the index built by build_pdf_index.
+    Tries an exact filename match, then a match on the first filename token,
+    then any filename containing the equipment name.
+    Returns dict mapping each matched equipment key to its PDF path, converted
+    back from the extended-length form.
+    """
+    token_index = build_token_index(pdf_index)
+    matches = {}
+    remaining = set()
+    for key in equipment_keys:
+        pdf_path = pdf_index.get(key) or token_index.get(key)
+        if pdf_path is not None:
+            matches[key] = from_long_path(pdf_path)
+        else:
+            remaining.add(key)
+    if not remaining:
+        return matches
+    # Slide a window of every remaining name length over each filename once,
+    # instead of testing every (equipment, filename) pair
+    key_lengths = sorted({len(key) for key in remaining})
+    for stem, pdf_path in pdf_index.items():
+        windows = (
+            stem[start:start + length]
+            for length in key_lengths
+            for start in range(len(stem) - length + 1)
+        )
+        for key in windows:
+            if key in remaining:
+                matches[key] = from_long_path(pdf_path)
+                remaining.discard(key)
+                # Stop scanning as soon as every name has been found
+                if not remaining:
+                    return matches
+    return matches
+def check_pdf_status(diffreport_folder, pdf_base_path, output_folder, output_filename, verbose=False):
     """
     Main function to check PDF status against DiffReport files.
     """
@@ -115,7 +316,8 @@ def check_pdf_status(diffreport_folder, pdf_base_path, output_folder, output_fil
         diffreport_folder, 
         "CompositeView", 
         expected_weekdays, 
-        expected_dates
+        expected_dates,
+        verbose=verbose
     )
     # Load and validate Substation report
     print("\n[2] Loading and validating Substation DiffReport...")
@@ -123,7 +325,8 @@ def check_pdf_status(diffreport_folder, pdf_base_path, output_folder, output_fil
         diffreport_folder, 
         "Substation", 
         expected_weekdays, 
-        expected_dates
+        expected_dates,
+        verbose=verbose
     )
     # Validation results
     print("\n" + "="*80)
@@ -163,9 +366,9 @@ def check_pdf_status(diffreport_folder, pdf_base_path, output_folder, output_fil
         return None
     # Filter for specific equipment types
     print("\n[4] Filtering for Circuit Breaker and Switch equipment...")
-    filtered_df = combined_df[
-        combined_df['Equipment Type'].isin(['Circuit Breaker', 'Switch'])
-    ].copy()
+    mask = combined_df['Equipment Type'].isin(('Circuit Breaker', 'Switch'))
+    # Keep just the two columns read from here on instead of every report column
+    filtered_df = combined_df.loc[mask, ['Equipment Name', 'Equipment Type']]
     print(f"  Filtered records: {len(filtered_df)}")
     if filtered_df.empty:
         print("\n⚠ Warning: No Circuit Breaker or Switch equipment found in the reports")
@@ -173,37 +376,25 @@ def check_pdf_status(diffreport_folder, pdf_base_path, output_folder, output_fil
     # Check PDF existence
     print("\n[5] Checking PDF file existence...")
     print(f"  Base search path: {pdf_base_path}")
-    pdf_status = []
-    total_equipment = len(filtered_df)
-    for idx, row in filtered_df.iterrows():
-        equipment_name = row['Equipment Name']
-        equipment_type = row['Equipment Type']
-        # Show progress
-        current_num = idx + 1
-        print(f"  [{current_num}/{total_equipment}] Checking: {equipment_name} ... ", end="")
-        pdf_path = find_pdf(pdf_base_path, equipment_name)
-        if pdf_path:
-            print(f"FOUND")
-            pdf_status.append({
-                'Equipment Name': equipment_name,
-                'Equipment Type': equipment_type,
-                'PDF Status': 'Exists',
-                'PDF Path': pdf_path
-            })
-        else:
-            print(f"NOT FOUND")
-            pdf_status.append({
-                'Equipment Name': equipment_name,
-                'Equipment Type': equipment_type,
-                'PDF Status': 'Missing',
-                'PDF Path': ''
-            })
-    # Create result dataframe
-    result_df = pd.DataFrame(pdf_status)
+    print(f"  Equipment to check: {len(filtered_df)}")
+    print("  Indexing PDF files...")
+    pdf_index = build_pdf_index(to_long_path(pdf_base_path))
+    print(f"  Indexed PDF names: {len(pdf_index)}")
+    keys = filtered_df['Equipment Name'].str.strip().str.lower()
+    pdf_paths = find_pdfs(pdf_index, keys.dropna().unique())
+    paths = keys.map(pdf_paths)
+    # Create result dataframe directly from column arrays
+    result_df = pd.DataFrame({
+        'Equipment Name': filtered_df['Equipment Name'].to_numpy(),
+        'Equipment Type': filtered_df['Equipment Type'].to_numpy(),
+        'PDF Status': np.where(paths.notna(), 'Exists', 'Missing'),
+        'PDF Path': paths.fillna('').to_numpy()
+    })
     # Generate summary statistics
     total_count = len(result_df)
-    exists_count = len(result_df[result_df['PDF Status'] == 'Exists'])
-    missing_count = len(result_df[result_df['PDF Status'] == 'Missing'])
+    status_counts = result_df['PDF Status'].value_counts()
+    exists_count = status_counts.get('Exists', 0)
+    missing_count = status_counts.get('Missing', 0)
     print("\n" + "="*80)
     print("SUMMARY:")
     print("-" * 80)
@@ -219,8 +410,15 @@ def check_pdf_status(diffreport_folder, pdf_base_path, output_folder, output_fil
     if missing_count > 0:
         print("\n⚠ Missing PDFs:")
         missing_df = result_df[result_df['PDF Status'] == 'Missing']
-        for idx, row in missing_df.iterrows():
-            print(f"  - {row['Equipment Name']} ({row['Equipment Type']})")
+        # Write the listing in batches rather than one console call per line
+        lines = []
+        for equipment_name, equipment_type in missing_df[['Equipment Name', 'Equipment Type']].itertuples(index=False, name=None):
+            lines.append(f"  - {equipment_name} ({equipment_type})")
+            if len(lines) == OUTPUT_BATCH_SIZE:
+                sys.stdout.write('\n'.join(lines) + '\n')
+                lines = []
+        if lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
     return result_df
 def interactive_path_input():
     """
@@ -274,6 +472,9 @@ def interactive_path_input():
         print("      Output CSV filename (default: _CVOfflineCheck.csv)")
         print('      Example: --output-filename "MyReport.csv"')
         print()
+        print("  --verbose")
+        print("      Print extra diagnostics, such as the DiffReport folder listing")
+        print()
         print("Full example:")
         print('  CVOfflineCheck_v2.exe --diffreport "\\\\admssim01\\ADMS_DataEngineering\\CompositeViewBackup\\DiffReport" --pdf-path "\\\\admssim01\\ADMS_DataEngineering\\DMS_Picture_offline" --output "D:\\MyReports"')
         print()
@@ -361,6 +562,11 @@ Interactive Mode Options:
         default='_CVOfflineCheck.csv',
         help='Output CSV filename (default: _CVOfflineCheck.csv)'
     )
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Print extra diagnostics, such as the DiffReport folder listing'
+    )
     return parser.parse_args()
 if __name__ == "__main__":
     # Check if running with command-line arguments
@@ -371,6 +577,7 @@ if __name__ == "__main__":
         pdf_base_path = args.pdf_path
         output_folder = args.output
         output_filename = args.output_filename
+        verbose = args.verbose
     else:
         # Interactive mode (double-clicked exe)
         path_config = interactive_path_input()
@@ -379,6 +586,7 @@ if __name__ == "__main__":
             sys.exit(0)
         diffreport_path, pdf_base_path, output_folder = path_config
         output_filename = '_CVOfflineCheck.csv'
+        verbose = False
     # Display configuration
     print("\n" + "="*80)
     print("CONFIGURATION:")
@@ -417,7 +625,8 @@ if __name__ == "__main__":
         diffreport_folder=diffreport_path,
         pdf_base_path=pdf_base_path,
         output_folder=output_folder,
-        output_filename=output_filename
+        output_filename=output_filename,
+        verbose=verbose
     )
     if result is not None:
         print("\n" + "="*80)